@@ -63,7 +63,10 @@ doctype_js = {
 
 # TODO: move to custom JSON: https://github.com/agritheory/shipstation_integration/issues/2
 before_migrate = "shipstation_integration.tests.setup.setup_custom_fields"
-after_migrate = ["shipstation_integration.install.add_custom_queue"]
+after_migrate = [
+	"shipstation_integration.install.add_custom_queue",
+	"shipstation_integration.install.add_shipstation_order_index",
+]
 after_install = "shipstation_integration.install.after_install"
 
 # Desk Notifications
@@ -61,5 +61,11 @@ def add_custom_queue():
 			print(f"Command failed: {stdout}.")
 
 
+def add_shipstation_order_index():
+	# speeds up the check for already imported orders when fetching from Shipstation
+	if frappe.db.has_column("Sales Order", "shipstation_order_id"):
+		frappe.db.add_index("Sales Order", ["shipstation_order_id", "docstatus"])
+
+
 def after_install():
 	add_custom_queue()
@@ -21,7 +21,7 @@ def create_item(
 	store: Optional["ShipstationStore"] = None,
 ) -> str:
 
-	if settings.shipstation_user:
+	if settings.shipstation_user and frappe.session.user != settings.shipstation_user:
 		frappe.set_user(settings.shipstation_user)
 
 	item_name = product.name[:140]
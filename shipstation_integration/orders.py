@@ -1,5 +1,7 @@
 import datetime
-from decimal import Decimal
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import TYPE_CHECKING
 
 import frappe
@@ -10,9 +12,12 @@ from httpx import HTTPError
 
 from shipstation_integration.customer import create_customer, get_billing_address
 from shipstation_integration.items import create_item
+from shipstation_integration.utils import set_shipstation_user
 
 if TYPE_CHECKING:
 	from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
+	from erpnext.stock.doctype.item.item import Item
+	from shipstation import ShipStation
 	from shipstation.models import ShipStationOrder, ShipStationOrderItem
 
 	from shipstation_integration.shipstation_integration.doctype.shipstation_settings.shipstation_settings import (
@@ -23,6 +28,14 @@ if TYPE_CHECKING:
 	)
 
 
+IMPORTED_ORDERS_CACHE_TTL = 24 * 60 * 60
+
+
+@functools.lru_cache(maxsize=64)
+def _resolve_hook(path: str):
+	return frappe.get_attr(path)
+
+
 def queue_orders():
 	if not is_job_queued("shipstation_integration.orders.list_orders", queue="shipstation"):
 		frappe.enqueue(
@@ -40,8 +53,14 @@ def list_orders(
 	elif not isinstance(settings, list):
 		settings = [settings]
 
+	update_parameter_hook = frappe.get_hooks("update_shipstation_list_order_parameters")
+	process_order_hook = frappe.get_hooks("process_shipstation_order")
+
+	# use the same window end for every store in this poll
+	now = datetime.datetime.utcnow()
+
 	for sss in settings:
-		sss_doc: "ShipstationSettings" = frappe.get_doc("Shipstation Settings", sss.name)
+		sss_doc: "ShipstationSettings" = frappe.get_cached_doc("Shipstation Settings", sss.name)
 		if not sss_doc.enabled:
 			continue
 
@@ -50,8 +69,9 @@ def list_orders(
 
 		if not last_order_datetime:
 			# Get data for the last day, Shipstation API behaves oddly when it's a shorter period
-			last_order_datetime = datetime.datetime.utcnow() - datetime.timedelta(hours=24)
+			last_order_datetime = now - datetime.timedelta(hours=24)
 
+		store_parameters: list[tuple["ShipstationStore", dict]] = []
 		store: "ShipstationStore"
 		for store in sss_doc.shipstation_stores:
 			if not store.enable_orders:
@@ -60,42 +80,87 @@ def list_orders(
 			parameters = {
 				"store_id": store.store_id,
 				"modify_date_start": last_order_datetime,
-				"modify_date_end": datetime.datetime.utcnow(),
+				"modify_date_end": now,
+				# Shipstation's maximum, to keep the number of sequential page requests low
+				"page_size": 500,
 			}
 
-			update_parameter_hook = frappe.get_hooks("update_shipstation_list_order_parameters")
 			if update_parameter_hook:
-				parameters = frappe.get_attr(update_parameter_hook[0])(parameters)
+				parameters = _resolve_hook(update_parameter_hook[0])(parameters)
 
-			try:
-				orders = client.list_orders(parameters=parameters)
-			except HTTPError as e:
-				frappe.log_error(title="Error while fetching Shipstation orders", message=e)
-				continue
-
-			order: "ShipStationOrder"
-			for order in orders:
-				if validate_order(sss_doc, order, store):
-					should_create_order = True
+			store_parameters.append((store, parameters))
 
-					process_order_hook = frappe.get_hooks("process_shipstation_order")
-					if process_order_hook:
-						should_create_order = frappe.get_attr(process_order_hook[0])(order, store)
+		if not store_parameters:
+			continue
 
-					if should_create_order:
-						create_erpnext_order(order, store, sss)
+		cached_order_ids = get_cached_imported_order_ids(sss_doc.name)
+
+		# switch users once for all of this account's orders instead of once per order
+		with set_shipstation_user(sss_doc.shipstation_user):
+			# fetch orders for all stores concurrently; the Frappe ORM isn't thread-safe,
+			# so orders are only created from the main thread
+			with ThreadPoolExecutor(max_workers=min(8, len(store_parameters))) as executor:
+				futures = {
+					executor.submit(fetch_orders, client, parameters): store
+					for store, parameters in store_parameters
+				}
+
+				for future in as_completed(futures):
+					store = futures[future]
+					try:
+						orders = future.result()
+					except HTTPError as e:
+						frappe.log_error(title="Error while fetching Shipstation orders", message=e)
+						continue
+
+					# recently imported orders come from the cache; the rest are checked in one
+					# query instead of once per order
+					existing_order_ids = set(cached_order_ids)
+					uncached_order_ids = [
+						str(order.order_id)
+						for order in orders
+						if order and str(order.order_id) not in existing_order_ids
+					]
+					if uncached_order_ids:
+						existing_order_ids.update(
+							frappe.db.get_all(
+								"Sales Order",
+								filters={"shipstation_order_id": ["in", uncached_order_ids], "docstatus": 1},
+								pluck="shipstation_order_id",
+							)
+						)
+
+					order: "ShipStationOrder"
+					for order in orders:
+						if validate_order(sss_doc, order, store, existing_order_ids):
+							should_create_order = True
+
+							if process_order_hook:
+								should_create_order = _resolve_hook(process_order_hook[0])(order, store)
+
+							if should_create_order:
+								create_erpnext_order(order, store, sss)
+								existing_order_ids.add(str(order.order_id))
+
+
+def fetch_orders(client: "ShipStation", parameters: dict) -> list["ShipStationOrder"]:
+	return list(client.list_orders(parameters=parameters))
 
 
 def validate_order(
 	settings: "ShipstationSettings",
 	order: "ShipStationOrder",
 	store: "ShipstationStore",
+	existing_order_ids: set[str] | None = None,
 ):
 	if not order:
 		return False
 
 	# if an order already exists, skip
-	if frappe.db.get_value("Sales Order", {"shipstation_order_id": order.order_id, "docstatus": 1}):
+	if existing_order_ids is not None:
+		if str(order.order_id) in existing_order_ids:
+			return False
+	elif frappe.db.exists("Sales Order", {"shipstation_order_id": order.order_id, "docstatus": 1}):
 		return False
 
 	# only create orders for warehouses defined in Shipstation Settings;
@@ -116,8 +181,11 @@ def validate_order(
 def create_erpnext_order(
 	order: "ShipStationOrder", store: "ShipstationStore", settings: "ShipstationSettings"
 ) -> str | None:
-	if settings.shipstation_user:
-		frappe.set_user(settings.shipstation_user)
+	with set_shipstation_user(settings.shipstation_user):
+		return _create_erpnext_order(order, store)
+
+
+def _create_erpnext_order(order: "ShipStationOrder", store: "ShipstationStore") -> str | None:
 	customer = (
 		frappe.get_cached_doc("Customer", store.customer) if store.customer else create_customer(order)
 	)
@@ -126,8 +194,8 @@ def create_erpnext_order(
 		{
 			"shipstation_store_name": store.store_name,
 			"shipstation_order_id": order.order_id,
-			"shipstation_customer_notes": getattr(order, "customer_notes", None),
-			"shipstation_internal_notes": getattr(order, "internal_notes", None),
+			"shipstation_customer_notes": order.customer_notes,
+			"shipstation_internal_notes": order.internal_notes,
 			"marketplace": store.marketplace_name,
 			"marketplace_order_id": order.order_number,
 			"customer": customer.name,
@@ -149,43 +217,50 @@ def create_erpnext_order(
 	if store.get("is_amazon_store"):
 		update_hook = frappe.get_hooks("update_shipstation_amazon_order")
 		if update_hook:
-			so = frappe.get_attr(update_hook[0])(store, order, so)
+			so = _resolve_hook(update_hook[0])(store, order, so)
 	elif store.get("is_shopify_store"):
 		update_hook = frappe.get_hooks("update_shipstation_shopify_order")
 		if update_hook:
-			so = frappe.get_attr(update_hook[0])(store, order, so)
+			so = _resolve_hook(update_hook[0])(store, order, so)
 
-	# using `hasattr` over `getattr` to use type annotations
-	order_items = order.items if hasattr(order, "items") else []
+	order_items = order.items or []
 	if not order_items:
 		return
 
 	process_order_items_hook = frappe.get_hooks("process_shipstation_order_items")
 	if process_order_items_hook:
-		order_items = frappe.get_attr(process_order_items_hook[0])(order_items)
+		order_items = _resolve_hook(process_order_items_hook[0])(order_items)
 
-	discount_amount = 0.0
-	for item in order_items:
-		if item.quantity < 1:
-			continue
-
-		rate = flt(item.unit_price) if hasattr(item, "unit_price") else 0.0
+	priced_items = [item for item in order_items if item.quantity >= 1]
 
-		# the only way to identify marketplace discounts via the Shipstation API is
-		# to find it using the `line_item_key` string
-		if item.line_item_key == "discount":
-			discount_amount += abs(rate * item.quantity)
-			continue
+	# the only way to identify marketplace discounts via the Shipstation API is
+	# to find it using the `line_item_key` string
+	discount_amount = sum(
+		abs(get_item_rate(item) * item.quantity)
+		for item in priced_items
+		if item.line_item_key == "discount"
+	)
+	non_discount_items = [item for item in priced_items if item.line_item_key != "discount"]
+	# keep going if the marketplace hooks already added items to the order
+	if not non_discount_items and not so.get("items"):
+		return
 
-		settings = frappe.get_doc("Shipstation Settings", store.parent)
-		stock_item = create_item(item, settings=settings, store=store)
+	item_settings: "ShipstationSettings" = frappe.get_cached_doc("Shipstation Settings", store.parent)
+	items = []
+	stock_items: dict[str, "Item"] = {}
+	for item in non_discount_items:
+		rate = get_item_rate(item)
+		# order lines for the same product only need the item created or updated once
+		item_key = item.sku.strip() if item.sku else item.name
+		if item_key not in stock_items:
+			stock_items[item_key] = create_item(item, settings=item_settings, store=store)
+		stock_item = stock_items[item_key]
 		uom = stock_item.sales_uom or stock_item.stock_uom
 		conversion_factor = (
 			1 if uom == stock_item.stock_uom else get_uom_conv_factor(uom, stock_item.stock_uom)
 		)
 		item_notes = get_item_notes(item)
-		so.append(
-			"items",
+		items.append(
 			{
 				"item_code": stock_item.item_code,
 				"qty": item.quantity,
@@ -195,50 +270,58 @@ def create_erpnext_order(
 				"warehouse": store.warehouse,
 				"shipstation_order_item_id": item.order_item_id,
 				"shipstation_item_notes": item_notes,
-			},
+			}
 		)
 
+	so.extend("items", items)
 	if not so.get("items"):
 		return
 
 	so.dont_update_if_missing = ["customer_name", "base_total_in_words"]
 
+	taxes = []
 	if order.tax_amount:
 		so.sales_tax_total = flt(order.tax_amount)
-		so.append(
-			"taxes",
+		taxes.append(
 			{
 				"charge_type": "Actual",
 				"account_head": store.tax_account,
 				"description": "Shipstation Tax Amount",
 				"tax_amount": order.tax_amount,
 				"cost_center": store.cost_center,
-			},
+			}
 		)
 
 	if order.shipping_amount:
 		so.shipping_revenue = flt(order.shipping_amount)
-		so.append(
-			"taxes",
+		taxes.append(
 			{
 				"charge_type": "Actual",
 				"account_head": store.shipping_income_account,
 				"description": "Shipstation Shipping Amount",
 				"tax_amount": order.shipping_amount,
 				"cost_center": store.cost_center,
-			},
+			}
 		)
 
-	so.save()
+	so.extend("taxes", taxes)
 	if store.customer:
 		so.customer_name = order.customer_email
-	# coupons
-	if order.amount_paid and Decimal(so.grand_total).quantize(Decimal(".01")) != order.amount_paid:
-		difference_amount = Decimal(Decimal(so.grand_total).quantize(Decimal(".01")) - order.amount_paid)
+
+	# compute totals in memory so the adjustments below can be made before saving
+	so.set_missing_values(for_validate=True)
+	so.calculate_taxes_and_totals()
+
+	# coupons; amounts are compared in cents to avoid float rounding differences
+	grand_total_cents = round(flt(so.grand_total) * 100)
+	amount_paid_cents = round(flt(order.amount_paid) * 100)
+	if order.amount_paid and grand_total_cents != amount_paid_cents:
+		difference_cents = grand_total_cents - amount_paid_cents
+		difference_amount = difference_cents / 100
 		so.shipstation_discount = difference_amount
 		account = store.difference_account
 		# if the shipping amount is noted but not charged (FBA orders), this correctly offsets it
-		if difference_amount == order.shipping_amount:
+		if difference_cents == round(flt(order.shipping_amount) * 100):
 			account = store.shipping_income_account
 		so.append(
 			"taxes",
@@ -287,27 +370,56 @@ def create_erpnext_order(
 
 	before_submit_hook = frappe.get_hooks("update_shipstation_order_before_submit")
 	if before_submit_hook:
-		so = frappe.get_attr(before_submit_hook[0])(store, so, order)
+		so = _resolve_hook(before_submit_hook[0])(store, so, order)
 		if so:
 			so.save()
 	if so:
 		so.submit()
+		cache_imported_order(store, order)
 		frappe.db.commit()
 
 	after_submit_hook = frappe.get_hooks("update_shipstation_order_after_submit")
-	if before_submit_hook:
-		frappe.get_attr(after_submit_hook[0])(store, so, order)
+	if so and after_submit_hook:
+		_resolve_hook(after_submit_hook[0])(store, so, order)
 		frappe.db.commit()
 
 	return so.name if so else None
 
 
+def get_imported_orders_cache_key(settings_name: str) -> str:
+	# most polls re-fetch the same orders, so recently imported IDs are kept in a Redis
+	# sorted set per Shipstation account, scored by import time so each ID expires on its own
+	return frappe.cache().make_key(f"shipstation:imported_orders:{settings_name}")
+
+
+def get_cached_imported_order_ids(settings_name: str) -> set[str]:
+	cache = frappe.cache()
+	key = get_imported_orders_cache_key(settings_name)
+	cache.zremrangebyscore(key, "-inf", time.time() - IMPORTED_ORDERS_CACHE_TTL)
+	return {frappe.safe_decode(order_id) for order_id in cache.zrange(key, 0, -1)}
+
+
+def cache_imported_order(store: "ShipstationStore", order: "ShipStationOrder"):
+	# only cache once the order is committed, so a rolled back order is fetched again
+	key = get_imported_orders_cache_key(store.parent)
+	order_id = str(order.order_id)
+
+	def add_to_cache():
+		cache = frappe.cache()
+		cache.zadd(key, {order_id: time.time()})
+		# drop the whole set if the account stops importing orders
+		cache.expire(key, IMPORTED_ORDERS_CACHE_TTL)
+
+	frappe.db.after_commit.add(add_to_cache)
+
+
+def uncache_imported_order(settings_name: str, order_id: str):
+	frappe.cache().zrem(get_imported_orders_cache_key(settings_name), str(order_id))
+
+
+def get_item_rate(item: "ShipStationOrderItem") -> float:
+	return flt(item.unit_price)
+
+
 def get_item_notes(item: "ShipStationOrderItem"):
-	notes = None
-	item_options = item.options if hasattr(item, "options") else None
-	if item_options:
-		for option in item_options:
-			if option.name == "Description":
-				notes = option.value
-				break
-	return notes
+	return next((option.value for option in item.options or [] if option.name == "Description"), None)
@@ -12,6 +12,14 @@ class ShipStationSalesOrder(SalesOrder):
 		elif self.shipstation_order_id and commission_formula:
 			self.total_commission = get_formula_based_commission(self, commission_formula)
 
+	def on_cancel(self):
+		super().on_cancel()
+		# let a cancelled order be imported again on the next Shipstation poll
+		if self.shipstation_order_id and self.integration_doctype == "Shipstation Settings":
+			from shipstation_integration.orders import uncache_imported_order
+
+			uncache_imported_order(self.integration_doc, self.shipstation_order_id)
+
 
 def get_formula_based_commission(doc, commission_formula=None):
 	if not commission_formula:
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 import frappe
 
 
@@ -22,6 +24,21 @@ def get_marketplace(id=None, name=None, region=None, domain=None):
 	return frappe._dict()
 
 
+@contextmanager
+def set_shipstation_user(user: str | None = None):
+	# `frappe.set_user` rebuilds permission caches, so skip it if the user is already active
+	if not user or frappe.session.user == user:
+		yield
+		return
+
+	previous_user = frappe.session.user
+	frappe.set_user(user)
+	try:
+		yield
+	finally:
+		frappe.set_user(previous_user)
+
+
 MARKETPLACES = {
 	"A2EUQ1WTGCTBG2": {
 		"name": "Canada",